@@ -17,6 +17,8 @@ interface Config {
     rate: string;
     volume: string;
     pitch: string;
+    max_concurrent: number;
+    cache_dir: string;
     available_voices: {
       male: string[];
       female: string[];
@@ -41,6 +43,7 @@ interface Config {
     audio_codec: string;
     crf: number;
     preset: string;
+    tune: string;
   };
   llm: {
     model: string;
@@ -117,6 +120,8 @@ function getDefaultConfig(): Config {
       rate: "+0%",
       volume: "+0%",
       pitch: "+0Hz",
+      max_concurrent: 5,
+      cache_dir: "~/.cache/ai-shorts/tts",
       available_voices: {
         male: ["en-US-ChristopherNeural", "en-US-EricNeural", "en-US-GuyNeural", "en-US-RogerNeural"],
         female: ["en-US-JennyNeural", "en-US-AriaNeural", "en-US-MichelleNeural"]
@@ -137,10 +142,11 @@ function getDefaultConfig(): Config {
       },
       fps: 30,
       format: "mp4",
-      codec: "libx264",
+      codec: "auto",
       audio_codec: "aac",
       crf: 23,
-      preset: "fast"
+      preset: "faster",
+      tune: "fastdecode"
     },
     llm: {
       model: "llama3.2",
@@ -7,7 +7,8 @@ Uses the new modular approach with separate audio, text, and video modules
 
 import sys
 import os
-import json
+import random
+import functools
 import ffmpeg
 from pathlib import Path
 from typing import List, Dict, Any
@@ -15,28 +16,31 @@ from typing import List, Dict, Any
 # Import our new modules
 from audio import get_audio_duration
 from text import create_subtitle_file
-from video import add_subtitles_to_video
+from audio_utils import get_audio_info
+from file_utils import read_json
+from prepare_video import apply_mobile_filters, get_video_duration, get_video_size
+from video import get_encode_options, is_prepared_background, run_ffmpeg, run_parallel_jobs
 
 
 def load_script_json(script_path: str) -> Dict[str, Any]:
     try:
-        with open(script_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return read_json(script_path)
     except Exception as e:
         raise Exception(f"Error loading script JSON: {str(e)}")
 
 
+@functools.lru_cache(maxsize=1)
 def load_config() -> Dict[str, Any]:
     try:
         config_path = os.path.join(os.path.dirname(__file__), "..", "config.json")
-        with open(config_path, 'r') as f:
-            return json.load(f)
+        return read_json(config_path)
     except Exception as e:
         print(f"Warning: Could not load config.json: {e}")
         return {}
 
 
-def assemble_video_with_subtitles(script_path: str, background_video: str, audio_file: str, output_path: str) -> str:
+def assemble_video_with_subtitles(script_path: str, background_video: str, audio_file: str, output_path: str,
+                                  threads: int = 0) -> str:
     try:
         # Check if all required files exist
         required_files = [script_path, background_video, audio_file]
@@ -68,6 +72,9 @@ def assemble_video_with_subtitles(script_path: str, background_video: str, audio
         config = load_config()
         text_config = config.get('text_overlay', {})
         subtitle_enabled = text_config.get('enabled', True)
+        encode_options = get_encode_options(config)
+        if threads:
+            encode_options['threads'] = threads
         
         if subtitle_enabled:
             print("Creating ASS subtitle file...")
@@ -78,37 +85,28 @@ def assemble_video_with_subtitles(script_path: str, background_video: str, audio
             
             print(f"Subtitle file created: {subtitle_path}")
             
-            # Create temporary video without subtitles first
-            temp_video = output_path.replace('.mp4', '_temp.mp4')
+            # Burn subtitles, mux audio and encode in a single ffmpeg pass
+            print("Combining video, audio and subtitles...")
+            video_input = ffmpeg.input(background_video, thread_queue_size=1024, fflags='+fastseek')
+            audio_input = ffmpeg.input(audio_file, thread_queue_size=1024)
             
-            # Combine video and audio
-            print("Combining video and audio...")
-            video_input = ffmpeg.input(background_video)
-            audio_input = ffmpeg.input(audio_file)
+            subtitled = video_input.video.filter('ass', subtitle_path)
             
             output = ffmpeg.output(
-                video_input,
-                audio_input,
-                temp_video,
-                vcodec='libx264',
+                subtitled,
+                audio_input.audio,
+                output_path,
                 acodec='aac',
-                preset='fast',
-                crf=23,
                 t=actual_duration,
-                shortest=None
+                shortest=None,
+                **encode_options
             )
             
             # Run the conversion
-            print("Rendering video with audio...")
-            ffmpeg.run(output, overwrite_output=True, capture_stdout=True, capture_stderr=True)
-            
-            # Add subtitles using the video module
-            print("Adding subtitles...")
-            add_subtitles_to_video(temp_video, subtitle_path, output_path)
+            print("Rendering video with audio and subtitles...")
+            run_ffmpeg(output, threads=threads)
             
             # Clean up temporary files
-            if os.path.exists(temp_video):
-                os.remove(temp_video)
             if os.path.exists(subtitle_path):
                 os.remove(subtitle_path)
             
@@ -118,24 +116,22 @@ def assemble_video_with_subtitles(script_path: str, background_video: str, audio
             print("Subtitles disabled, creating video without subtitles...")
             
             # Combine video and audio directly
-            video_input = ffmpeg.input(background_video)
-            audio_input = ffmpeg.input(audio_file)
+            video_input = ffmpeg.input(background_video, thread_queue_size=1024, fflags='+fastseek')
+            audio_input = ffmpeg.input(audio_file, thread_queue_size=1024)
             
             output = ffmpeg.output(
                 video_input,
                 audio_input,
                 output_path,
-                vcodec='libx264',
                 acodec='aac',
-                preset='fast',
-                crf=23,
                 t=actual_duration,
-                shortest=None
+                shortest=None,
+                **encode_options
             )
             
             # Run the conversion
             print("Rendering final video...")
-            ffmpeg.run(output, overwrite_output=True, capture_stdout=True, capture_stderr=True)
+            run_ffmpeg(output, threads=threads)
             
             print(f"Video assembled: {output_path}")
         
@@ -148,7 +144,8 @@ def assemble_video_with_subtitles(script_path: str, background_video: str, audio
         raise Exception(f"Error assembling video: {str(e)}")
 
 
-def assemble_video_simple(script_path: str, background_video: str, audio_file: str, output_path: str) -> str:
+def assemble_video_simple(script_path: str, background_video: str, audio_file: str, output_path: str,
+                          threads: int = 0) -> str:
     """
     Simple video assembly without subtitles (fallback method)
     
@@ -157,6 +154,7 @@ def assemble_video_simple(script_path: str, background_video: str, audio_file: s
         background_video: Path to background video file
         audio_file: Path to audio file
         output_path: Path for output video file
+        threads: FFmpeg thread count (0 lets ffmpeg use every core)
         
     Returns:
         Path to the assembled video file
@@ -188,9 +186,21 @@ def assemble_video_simple(script_path: str, background_video: str, audio_file: s
         print(f"Actual audio duration: {actual_duration:.2f} seconds")
         print(f"Scenes: {len(scenes)}")
         
+        # Load encoder settings
+        encode_options = get_encode_options(load_config())
+        
+        # Remux instead of re-encoding when the background is already prepared
+        if is_prepared_background(background_video):
+            print("Background is already H.264 720x1280, copying video stream...")
+            encode_options = {'vcodec': 'copy', 'movflags': '+faststart'}
+        elif threads:
+            encode_options['threads'] = threads
+        
+        audio_codec = 'copy' if get_audio_info(audio_file)['codec'] == 'aac' else 'aac'
+        
         # Create input streams
-        video_input = ffmpeg.input(background_video)
-        audio_input = ffmpeg.input(audio_file)
+        video_input = ffmpeg.input(background_video, thread_queue_size=1024, fflags='+fastseek')
+        audio_input = ffmpeg.input(audio_file, thread_queue_size=1024)
         
         # Combine video and audio
         print("Combining video and audio...")
@@ -198,17 +208,106 @@ def assemble_video_simple(script_path: str, background_video: str, audio_file: s
             video_input,
             audio_input,
             output_path,
-            vcodec='libx264',
-            acodec='aac',
-            preset='fast',
-            crf=23,
+            acodec=audio_codec,
             t=actual_duration,
-            shortest=None
+            shortest=None,
+            **encode_options
         )
         
         # Run the conversion
         print("Rendering final video...")
-        ffmpeg.run(output, overwrite_output=True, capture_stdout=True, capture_stderr=True)
+        run_ffmpeg(output, threads=threads)
+        
+        print(f"Video assembled: {output_path}")
+        return output_path
+        
+    except ffmpeg.Error as e:
+        stderr_output = e.stderr.decode('utf-8') if e.stderr else 'No stderr output'
+        raise Exception(f"FFmpeg error: {stderr_output}")
+    except Exception as e:
+        raise Exception(f"Error assembling video: {str(e)}")
+
+
+def assemble_from_raw(raw_background: str, audio_file: str, script_path: str, output_path: str,
+                      threads: int = 0) -> str:
+    """
+    Prepare the background and assemble the short in a single ffmpeg pass
+    
+    Trims (from a random start) or loops the raw source, crops it to 9:16,
+    burns subtitles and muxes the audio with one decode and one encode, so no
+    intermediate background.mp4 is written.
+    
+    Args:
+        raw_background: Path to the unprocessed stock video
+        audio_file: Path to audio file
+        script_path: Path to script.json file
+        output_path: Path for output video file
+        threads: FFmpeg thread count (0 lets ffmpeg use every core)
+        
+    Returns:
+        Path to the assembled video file
+    """
+    try:
+        # Check if all required files exist
+        required_files = [script_path, raw_background, audio_file]
+        for file_path in required_files:
+            if not os.path.exists(file_path):
+                raise FileNotFoundError(f"Required file not found: {file_path}")
+        
+        # Check for updated script with actual timings first
+        script_path_updated = script_path.replace('.json', '_updated.json')
+        if os.path.exists(script_path_updated):
+            print("Found updated script with actual timings, using that...")
+            script_path = script_path_updated
+        
+        print("Loading script data...")
+        script_data = load_script_json(script_path)
+        scenes = script_data['scenes']
+        
+        actual_duration = get_audio_duration(audio_file)
+        source_duration = get_video_duration(raw_background)
+        print(f"Actual audio duration: {actual_duration:.2f} seconds")
+        print(f"Source video duration: {source_duration:.2f} seconds")
+        
+        # Seek into long sources, loop short ones at the demuxer
+        if source_duration > actual_duration:
+            max_start_time = max(0, source_duration - actual_duration - 5)  # Leave 5 seconds buffer
+            random_start = random.uniform(0, max_start_time)
+            print(f"Random start point: {random_start:.2f} seconds")
+            video_input = ffmpeg.input(raw_background, ss=random_start)
+        else:
+            print("Source is shorter than the audio, looping...")
+            video_input = ffmpeg.input(raw_background, stream_loop=-1)
+        
+        # Crop to 9:16 mobile format unless the source already matches
+        video = apply_mobile_filters(video_input.video, *get_video_size(raw_background))
+        
+        config = load_config()
+        encode_options = get_encode_options(config)
+        if threads:
+            encode_options['threads'] = threads
+        
+        subtitle_path = None
+        if config.get('text_overlay', {}).get('enabled', True):
+            print("Creating ASS subtitle file...")
+            subtitle_path = create_subtitle_file(scenes, output_path.replace('.mp4', '_subtitles'))
+            video = video.filter('ass', subtitle_path)
+        
+        output = ffmpeg.output(
+            video,
+            ffmpeg.input(audio_file).audio,
+            output_path,
+            acodec='aac',
+            t=actual_duration,
+            **encode_options
+        )
+        
+        print("Rendering final video from raw background...")
+        run_ffmpeg(output, threads=threads)
+        
+        # Clean up temporary files
+        if subtitle_path and os.path.exists(subtitle_path):
+            os.remove(subtitle_path)
         
         print(f"Video assembled: {output_path}")
         return output_path
@@ -220,11 +319,36 @@ def assemble_video_simple(script_path: str, background_video: str, audio_file: s
         raise Exception(f"Error assembling video: {str(e)}")
 
 
+def assemble_job(job: Dict[str, str], threads: int = 0) -> str:
+    # Same strategy as main(): subtitles first, simple assembly as fallback
+    args = (job['script_path'], job['background_video'], job['audio_file'], job['output_path'])
+    try:
+        return assemble_video_with_subtitles(*args, threads=threads)
+    except Exception as e:
+        print(f"Subtitle approach failed for {job['output_path']}: {str(e)}")
+        return assemble_video_simple(*args, threads=threads)
+
+
+def assemble_many(jobs: List[Dict[str, str]], threads_per_job: int = 4) -> List[str]:
+    """
+    Assemble several shorts concurrently, each ffmpeg process capped to a few threads
+    
+    Args:
+        jobs: List of dicts with script_path, background_video, audio_file and output_path
+        threads_per_job: FFmpeg thread count for each job
+        
+    Returns:
+        Output paths in the same order as jobs
+    """
+    return run_parallel_jobs(assemble_job, jobs, threads_per_job)
+
+
 def main():
     """Main function for command line usage"""
     if len(sys.argv) < 5:
-        print("Usage: python assemble.py <script_path> <background_video> <audio_file> <output_path>")
+        print("Usage: python assemble.py <script_path> <background_video> <audio_file> <output_path> [--raw]")
         print("Example: python assemble.py script.json background.mp4 speech.wav output.mp4")
+        print("\nPass --raw when background_video is the unprocessed stock video to prepare and assemble in one pass")
         sys.exit(1)
     
     script_path = sys.argv[1]
@@ -232,6 +356,15 @@ def main():
     audio_file = sys.argv[3]
     output_path = sys.argv[4]
     
+    if '--raw' in sys.argv[5:]:
+        try:
+            result = assemble_from_raw(background_video, audio_file, script_path, output_path)
+            print(f"Success: {result}")
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            sys.exit(1)
+        return
+    
     try:
         # Try the new subtitle-based approach first
         print("Attempting to assemble video with subtitles...")
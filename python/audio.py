@@ -1,17 +1,21 @@
 import os
 import sys
-import json
 import asyncio
+import bisect
+import functools
 import edge_tts
 import ffmpeg
 from typing import Dict, List, Any
 
+from file_utils import fast_copy, read_json, write_concat_list
+from probe import probe_cached, read_header_duration
 
+
+@functools.lru_cache(maxsize=1)
 def load_config() -> Dict[str, Any]:
     try:
         config_path = os.path.join(os.path.dirname(__file__), "..", "config.json")
-        with open(config_path, 'r') as f:
-            return json.load(f)
+        return read_json(config_path)
     except Exception as e:
         print(f"Warning: Could not load config.json: {e}")
         return {}
@@ -19,29 +23,30 @@ def load_config() -> Dict[str, Any]:
 
 def get_audio_duration(input_path: str) -> float:
     try:
-        probe = ffmpeg.probe(input_path)
+        duration = read_header_duration(input_path)
+        if duration is not None:
+            return duration
+        
+        probe = probe_cached(input_path)
         duration = float(probe['streams'][0]['duration'])
         return duration
     except Exception as e:
         raise Exception(f"Error getting audio duration: {str(e)}")
 
 
+# Percentage thresholds and the prosody rate names between them
+PROSODY_RATE_THRESHOLDS = (-25, 0, 25, 50)
+PROSODY_RATE_NAMES = ('x-slow', 'slow', 'medium', 'fast', 'x-fast')
+
+
+@functools.lru_cache(maxsize=64)
 def convert_rate_to_prosody(rate: str) -> str:
     if rate.endswith('%'):
         try:
             percentage = int(rate.replace('%', '').replace('+', ''))
-            if percentage >= 50:
-                return "x-fast"
-            elif percentage >= 25:
-                return "fast"
-            elif percentage >= 0:
-                return "medium"
-            elif percentage >= -25:
-                return "slow"
-            else:
-                return "x-slow"
-        except:
+        except ValueError:
             return "medium"
+        return PROSODY_RATE_NAMES[bisect.bisect_right(PROSODY_RATE_THRESHOLDS, percentage)]
     
     # Already a named rate
     return rate
@@ -63,37 +68,86 @@ async def synthesize_text(text: str, output_path: str, voice: str = "en-US-Chris
         raise Exception(f"Error synthesizing text: {str(e)}")
 
 
-def synthesize_scene_text(scene_text: str, output_path: str) -> None:
-    config = load_config()
-    tts_config = config.get('tts', {})
+def get_tts_settings() -> Dict[str, str]:
+    tts_config = load_config().get('tts', {})
     
-    voice = tts_config.get('voice', 'en-US-ChristopherNeural')
-    rate = tts_config.get('rate', 'medium')
-    volume = tts_config.get('volume', '+0%')
-    pitch = tts_config.get('pitch', '+0Hz')
+    return {
+        'voice': tts_config.get('voice', 'en-US-ChristopherNeural'),
+        'rate': tts_config.get('rate', 'medium'),
+        'volume': tts_config.get('volume', '+0%'),
+        'pitch': tts_config.get('pitch', '+0Hz')
+    }
+
+
+def synthesize_scene_text(scene_text: str, output_path: str) -> None:
+    settings = get_tts_settings()
     
     print(f"Synthesizing scene text...")
     
     # Run async synthesis
-    asyncio.run(synthesize_text(scene_text, output_path, voice, rate, volume, pitch))
+    asyncio.run(synthesize_text(scene_text, output_path, **settings))
+
+
+async def synthesize_texts(texts: List[str], output_paths: List[str], voice: str = "en-US-ChristopherNeural",
+                           rate: str = "medium", volume: str = "+0%", pitch: str = "+0Hz") -> None:
+    # Run every synthesis concurrently so the Edge TTS round-trips overlap
+    await asyncio.gather(*(
+        synthesize_text(text, output_path, voice, rate, volume, pitch)
+        for text, output_path in zip(texts, output_paths)
+    ))
+
+
+def synthesize_scenes(scene_texts: List[str], output_paths: List[str]) -> None:
+    if len(scene_texts) != len(output_paths):
+        raise ValueError("scene_texts and output_paths must have the same length")
+    
+    settings = get_tts_settings()
+    
+    print(f"Synthesizing {len(scene_texts)} scenes...")
+    
+    # One event loop for the whole batch
+    asyncio.run(synthesize_texts(scene_texts, output_paths, **settings))
+
+
+def can_stream_copy_audio(audio_files: List[str], output_path: str) -> bool:
+    # Stream copy only works when every input shares codec parameters and the output container
+    output_ext = os.path.splitext(output_path)[1].lower()
+    if any(os.path.splitext(file)[1].lower() != output_ext for file in audio_files):
+        return False
+    
+    stream_params = set()
+    for file in audio_files:
+        stream = probe_cached(file)['streams'][0]
+        stream_params.add((stream.get('codec_name'), stream.get('sample_rate'), stream.get('channels')))
+    
+    return len(stream_params) == 1
 
 
 def combine_audio_files(audio_files: List[str], output_path: str) -> None:
     try:
         if len(audio_files) == 1:
             # Just copy the single file
-            import shutil
-            shutil.copy2(audio_files[0], output_path)
+            fast_copy(audio_files[0], output_path)
+            return
+        
+        if can_stream_copy_audio(audio_files, output_path):
+            # Concat demuxer with stream copy: no decode or re-encode
+            list_path = write_concat_list(audio_files)
+            try:
+                output = ffmpeg.input(list_path, format='concat', safe=0).output(output_path, c='copy')
+                ffmpeg.run(output, overwrite_output=True, capture_stderr=True)
+            finally:
+                os.remove(list_path)
             return
         
         # Create input streams
         inputs = [ffmpeg.input(file) for file in audio_files]
         
         # Concatenate audio streams
-        output = ffmpeg.concat(*inputs, v=0, a=1)
+        output = ffmpeg.concat(*inputs, v=0, a=1).output(output_path)
         
         # Run conversion
-        ffmpeg.run(output, overwrite_output=True, quiet=True)
+        ffmpeg.run(output, overwrite_output=True, capture_stderr=True)
         
     except Exception as e:
         raise Exception(f"Error combining audio files: {str(e)}")
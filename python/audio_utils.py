@@ -4,13 +4,15 @@ Audio utility functions for duration detection and processing
 """
 
 import os
-import subprocess
 import json
+import ffmpeg
 from pathlib import Path
 
+from probe import probe_cached, read_header_duration
+
 def get_audio_duration(audio_file_path: str) -> float:
     """
-    Get the duration of an audio file using FFprobe
+    Get the duration of an audio file from its headers, falling back to FFprobe
     
     Args:
         audio_file_path: Path to the audio file
@@ -22,23 +24,19 @@ def get_audio_duration(audio_file_path: str) -> float:
         if not os.path.exists(audio_file_path):
             raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
         
-        # Use ffprobe to get audio duration
-        cmd = [
-            'ffprobe',
-            '-v', 'quiet',
-            '-print_format', 'json',
-            '-show_format',
-            audio_file_path
-        ]
+        # Read the duration from the file headers when the container is known
+        duration = read_header_duration(audio_file_path)
+        if duration is not None:
+            return duration
         
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        data = json.loads(result.stdout)
+        # Fall back to ffprobe (cached per file)
+        data = probe_cached(audio_file_path)
         
         duration = float(data['format']['duration'])
         return duration
         
-    except subprocess.CalledProcessError as e:
-        raise Exception(f"FFprobe error: {e.stderr}")
+    except ffmpeg.Error as e:
+        raise Exception(f"FFprobe error: {e.stderr.decode('utf-8', 'replace') if e.stderr else e}")
     except json.JSONDecodeError as e:
         raise Exception(f"Error parsing FFprobe output: {e}")
     except Exception as e:
@@ -58,18 +56,8 @@ def get_audio_info(audio_file_path: str) -> dict:
         if not os.path.exists(audio_file_path):
             raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
         
-        # Use ffprobe to get detailed audio info
-        cmd = [
-            'ffprobe',
-            '-v', 'quiet',
-            '-print_format', 'json',
-            '-show_format',
-            '-show_streams',
-            audio_file_path
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        data = json.loads(result.stdout)
+        # Use ffprobe (cached per file) to get detailed audio info
+        data = probe_cached(audio_file_path)
         
         # Extract audio stream info
         audio_stream = None
@@ -91,8 +79,8 @@ def get_audio_info(audio_file_path: str) -> dict:
         
         return info
         
-    except subprocess.CalledProcessError as e:
-        raise Exception(f"FFprobe error: {e.stderr}")
+    except ffmpeg.Error as e:
+        raise Exception(f"FFprobe error: {e.stderr.decode('utf-8', 'replace') if e.stderr else e}")
     except json.JSONDecodeError as e:
         raise Exception(f"Error parsing FFprobe output: {e}")
     except Exception as e:
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+File utility functions shared by the audio and video modules
+"""
+
+import os
+import json
+import shutil
+import tempfile
+from typing import Any, List
+
+try:
+    import orjson
+    json_loads = orjson.loads
+
+    def json_dumps(data: Any) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+except ImportError:
+    json_loads = json.loads
+
+    def json_dumps(data: Any) -> bytes:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def fast_copy(src: str, dst: str) -> None:
+    """
+    Copy a file while moving as few bytes as possible
+
+    Uses an in-kernel copy_file_range (reflinked on Btrfs/XFS), falling back
+    to a regular copy. dst is always an independent file, never a hardlink.
+
+    Args:
+        src: Path to the source file
+        dst: Path to the destination file (replaced if it exists)
+    """
+    # dst is removed before copying, so copying a file onto itself would delete it
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+
+    if os.path.lexists(dst):
+        os.remove(dst)
+
+    if hasattr(os, 'copy_file_range'):
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                return
+        except OSError:
+            pass
+
+    shutil.copyfile(src, dst)
+
+
+def write_concat_list(paths: List[str]) -> str:
+    """
+    Write a list file for ffmpeg's concat demuxer
+
+    Args:
+        paths: Media files in playback order
+
+    Returns:
+        Path to the temporary list file; the caller removes it
+    """
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as f:
+        for path in paths:
+            # Single quotes inside a quoted path are written as '\''
+            escaped_path = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped_path}'\n")
+        return f.name
+
+
+def read_json(path: str) -> Any:
+    """
+    Read and parse a JSON file, using orjson when it is installed
+
+    Args:
+        path: Path to the JSON file
+
+    Returns:
+        Parsed JSON data
+    """
+    with open(path, 'rb') as f:
+        return json_loads(f.read())
+
+
+def write_json(path: str, data: Any) -> None:
+    """
+    Write data as indented UTF-8 JSON, using orjson when it is installed
+
+    Args:
+        path: Path to the JSON file
+        data: JSON-serializable data
+    """
+    with open(path, 'wb') as f:
+        f.write(json_dumps(data))
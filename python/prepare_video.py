@@ -8,8 +8,55 @@ import sys
 import os
 import ffmpeg
 from pathlib import Path
-import math
 import random
+from typing import Dict, Optional, Tuple
+
+from probe import probe_cached
+from video import TARGET_HEIGHT, TARGET_WIDTH, get_encode_options, is_prepared_background
+
+# Scale and crop any input to 9:16 mobile format
+MOBILE_VF = f"scale={TARGET_WIDTH}:{TARGET_HEIGHT}:force_original_aspect_ratio=increase,crop={TARGET_WIDTH}:{TARGET_HEIGHT}"
+
+def get_video_size(input_path: str) -> Tuple[int, int]:
+    """
+    Get the width and height of the first video stream
+    
+    Args:
+        input_path: Path to the input video file
+        
+    Returns:
+        (width, height) in pixels
+    """
+    probe = probe_cached(input_path)
+    video_stream = next(stream for stream in probe['streams'] if stream['codec_type'] == 'video')
+    return int(video_stream['width']), int(video_stream['height'])
+
+def mobile_vf(width: int, height: int) -> Optional[str]:
+    """
+    Filter string for the mobile scale+crop, or None when the input is already 720x1280
+    """
+    if (width, height) == (TARGET_WIDTH, TARGET_HEIGHT):
+        return None
+    return MOBILE_VF
+
+def apply_mobile_filters(stream, width: int, height: int):
+    """
+    Add the mobile scale+crop to an ffmpeg-python stream unless the input is already 720x1280
+    """
+    if not mobile_vf(width, height):
+        return stream
+    return (
+        stream
+        .filter('scale', TARGET_WIDTH, TARGET_HEIGHT, force_original_aspect_ratio='increase')
+        .filter('crop', TARGET_WIDTH, TARGET_HEIGHT)
+    )
+
+def mobile_filter_options(input_path: str) -> Dict[str, str]:
+    """
+    ffmpeg output kwargs applying the mobile scale+crop only when it changes the frames
+    """
+    vf = mobile_vf(*get_video_size(input_path))
+    return {'vf': vf} if vf else {}
 
 def get_video_duration(input_path: str) -> float:
     """
@@ -22,7 +69,7 @@ def get_video_duration(input_path: str) -> float:
         Duration in seconds
     """
     try:
-        probe = ffmpeg.probe(input_path)
+        probe = probe_cached(input_path)
         duration = float(probe['streams'][0]['duration'])
         return duration
     except Exception as e:
@@ -63,19 +110,21 @@ def trim_video_to_duration(input_path: str, output_path: str, target_duration: f
         print(f"Random start point: {random_start:.2f} seconds")
         print(f"Target duration: {target_duration:.2f} seconds")
         
-        # Trim video to target duration with mobile aspect ratio (9:16) by cropping
-        (
-            ffmpeg
-            .input(input_path, ss=random_start, t=target_duration)
-            .output(output_path, 
-                   vcodec='libx264',
-                   acodec='aac',
-                   preset='fast',
-                   crf=23,
-                   vf='scale=720:1280:force_original_aspect_ratio=increase,crop=720:1280')  # Crop to 9:16 aspect ratio
-            .overwrite_output()
-            .run(quiet=True)
-        )
+        # Seek to the nearest keyframe; up to one GOP of drift is fine for background footage
+        input_stream = ffmpeg.input(input_path, ss=random_start, t=target_duration, noaccurate_seek=None)
+        
+        if is_prepared_background(input_path):
+            # Already 9:16 H.264, only the cut is needed
+            print("Input is already H.264 720x1280, copying streams...")
+            output = input_stream.output(output_path, c='copy', movflags='+faststart')
+        else:
+            # Trim video to target duration with mobile aspect ratio (9:16) by cropping
+            output = input_stream.output(output_path,
+                                         acodec='aac',
+                                         **mobile_filter_options(input_path),  # Crop to 9:16 aspect ratio
+                                         **get_encode_options())
+        
+        output.overwrite_output().run(capture_stderr=True)
         
         return f"Video trimmed successfully: {output_path}"
         
@@ -113,30 +162,21 @@ def loop_video_to_duration(input_path: str, output_path: str, target_duration: f
         if duration >= target_duration:
             return f"Error: Video is already {duration:.2f} seconds or longer. Use trim_video instead."
         
-        # Calculate how many loops we need
-        loops_needed = math.ceil(target_duration / duration)
-        print(f"Need to loop video {loops_needed} times to reach {target_duration} seconds")
-        
-        # Create input stream
-        input_stream = ffmpeg.input(input_path)
+        print(f"Looping video until it reaches {target_duration} seconds")
         
-        # Loop the video
-        looped_video = input_stream
-        for _ in range(loops_needed - 1):
-            looped_video = ffmpeg.concat(looped_video, input_stream, v=1, a=1)
+        # Loop the input at the demuxer indefinitely; -t below stops at the target duration
+        looped_video = ffmpeg.input(input_path, stream_loop=-1)
         
         # Trim to exact target duration with mobile aspect ratio (9:16) by cropping
         (
             looped_video
             .output(output_path,
-                   vcodec='libx264',
                    acodec='aac',
-                   preset='fast',
-                   crf=23,
-                   vf='scale=720:1280:force_original_aspect_ratio=increase,crop=720:1280',
-                   t=target_duration)  # Trim to exact duration
+                   t=target_duration,  # Trim to exact duration
+                   **mobile_filter_options(input_path),
+                   **get_encode_options())
             .overwrite_output()
-            .run(quiet=True)
+            .run(capture_stderr=True)
         )
         
         return f"Video looped successfully: {output_path}"
@@ -183,13 +223,11 @@ def prepare_background_video(input_path: str, output_path: str, target_duration:
                 ffmpeg
                 .input(input_path)
                 .output(output_path,
-                       vcodec='libx264',
                        acodec='aac',
-                       preset='fast',
-                       crf=23,
-                       vf='scale=720:1280:force_original_aspect_ratio=increase,crop=720:1280')
+                       **mobile_filter_options(input_path),
+                       **get_encode_options())
                 .overwrite_output()
-                .run(quiet=True)
+                .run(capture_stderr=True)
             )
             return f"Video converted to mobile format successfully: {output_path}"
             
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Media probing helpers (cached FFprobe, header-only duration) shared by the audio and video modules
+"""
+
+import os
+import functools
+import subprocess
+import ffmpeg
+from typing import Optional
+
+try:
+    import mutagen
+except ImportError:
+    mutagen = None
+
+from file_utils import json_loads
+
+
+@functools.lru_cache(maxsize=64)
+def _probe(path: str, mtime_ns: int, size: int) -> dict:
+    # Parse ffprobe's stdout as bytes; both orjson and json accept bytes, so no str decode pass
+    cmd = ['ffprobe', '-v', 'error', '-show_format', '-show_streams', '-of', 'json', path]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise ffmpeg.Error('ffprobe', result.stdout, result.stderr)
+    return json_loads(result.stdout)
+
+
+def probe_cached(path: str) -> dict:
+    """
+    Probe a media file, reusing the previous result while the file is unchanged
+
+    Args:
+        path: Path to the media file
+
+    Returns:
+        FFprobe output (format and streams) as a dictionary; treat it as read-only
+    """
+    stat = os.stat(path)
+    return _probe(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def read_header_duration(path: str) -> Optional[float]:
+    """
+    Read the duration straight from the file headers without spawning ffprobe
+
+    Args:
+        path: Path to the media file
+
+    Returns:
+        Duration in seconds, or None when mutagen is missing or does not know the container
+    """
+    if mutagen is None:
+        return None
+
+    try:
+        media = mutagen.File(path)
+    except Exception:
+        return None
+
+    if media is None or not getattr(media.info, 'length', 0):
+        return None
+
+    return float(media.info.length)
@@ -3,12 +3,32 @@
 import sys
 import os
 import json
+import functools
+import hashlib
 import asyncio
+import io
 import edge_tts
 from pathlib import Path
 import subprocess
-import ffmpeg
+from typing import Tuple
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+from file_utils import read_json, write_concat_list, write_json
+
+# Edge TTS always returns constant-bitrate MP3 (audio-24khz-48kbitrate-mono-mp3)
+EDGE_TTS_MP3_BITRATE = 48000
+
+# Used when config.json has no tts.cache_dir; set it to "" to disable the cache
+DEFAULT_TTS_CACHE_DIR = "~/.cache/ai-shorts/tts"
+
+# Leading ffmpeg arguments: overwrite output, only print errors
+FFMPEG_QUIET = ('ffmpeg', '-hide_banner', '-loglevel', 'error', '-y')
+
+@functools.lru_cache(maxsize=4)
 def load_config(config_path: str = "../config.json") -> dict:
     try:
         # Try to find config in multiple locations
@@ -19,11 +39,12 @@ def load_config(config_path: str = "../config.json") -> dict:
             "../config.json"
         ]
         
+        # Open each candidate directly; a miss costs one failed open instead of abspath + stat + open
         for path in possible_paths:
-            abs_path = os.path.abspath(path)
-            if os.path.exists(abs_path):
-                with open(abs_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+            try:
+                return read_json(path)
+            except FileNotFoundError:
+                continue
         
         # Return default config if file not found
         print("Warning: config.json not found, using default settings")
@@ -46,6 +67,10 @@ def load_config(config_path: str = "../config.json") -> dict:
             }
         }
 
+def reload_config() -> None:
+    """Drop the cached config so the next load_config() re-reads config.json"""
+    load_config.cache_clear()
+
 def load_script_json(script_path: str) -> dict:
     """
     Load and parse the script JSON file
@@ -57,28 +82,52 @@ def load_script_json(script_path: str) -> dict:
         Parsed script data
     """
     try:
-        if not os.path.exists(script_path):
-            raise FileNotFoundError(f"Script file not found: {script_path}")
-        
-        with open(script_path, 'r', encoding='utf-8') as f:
-            script_data = json.load(f)
-        
-        return script_data
+        # A missing file surfaces as FileNotFoundError from open()
+        return read_json(script_path)
         
     except json.JSONDecodeError as e:
         raise ValueError(f"Invalid JSON in script file: {str(e)}")
     except Exception as e:
         raise Exception(f"Error loading script: {str(e)}")
 
+async def synthesize_scene_audio(text: str, scene_index: int,
+                                 voice: str = "en-US-ChristopherNeural",
+                                 rate: str = "+0%", volume: str = "+0%", pitch: str = "+0Hz") -> bytes:
+    """
+    Synthesize speech for a single scene into memory using Edge TTS
+    
+    Args:
+        text: Text to synthesize
+        scene_index: Index of the scene (for logging)
+        voice: Voice to use
+        rate: Speech rate (e.g., "-50%" to "+50%")
+        volume: Speech volume (e.g., "-50%" to "+50%")
+        pitch: Speech pitch (e.g., "-50Hz" to "+50Hz")
+        
+    Returns:
+        Raw MP3 bytes (constant bitrate, see EDGE_TTS_MP3_BITRATE)
+    """
+    print(f"  Generating audio for scene {scene_index} with voice: {voice}, rate: {rate}")
+    
+    communicate = edge_tts.Communicate(text, voice, rate=rate, volume=volume, pitch=pitch)
+    
+    audio = io.BytesIO()
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio":
+            audio.write(chunk["data"])
+    
+    return audio.getvalue()
+
+
 async def synthesize_scene_text(text: str, output_path: str, scene_index: int, 
                                 voice: str = "en-US-ChristopherNeural",
-                                rate: str = "+0%", volume: str = "+0%", pitch: str = "+0Hz") -> str:
+                                rate: str = "+0%", volume: str = "+0%", pitch: str = "+0Hz") -> Tuple[str, float]:
     """
-    Synthesize speech for a single scene using Edge TTS
+    Synthesize speech for a single scene to a file using Edge TTS
     
     Args:
         text: Text to synthesize
-        output_path: Path for output audio file
+        output_path: Path for output audio file (its directory must exist)
         scene_index: Index of the scene (for logging)
         voice: Voice to use (default: en-US-ChristopherNeural - natural male voice)
         rate: Speech rate (e.g., "-50%" to "+50%")
@@ -95,47 +144,77 @@ async def synthesize_scene_text(text: str, output_path: str, scene_index: int,
         - en-US-MichelleNeural (Female, warm)
         
     Returns:
-        Success message
+        Tuple of (status message, audio duration in seconds); failures raise
     """
-    try:
-        # Ensure output directory exists
-        output_dir = os.path.dirname(output_path)
-        if output_dir:
-            os.makedirs(output_dir, exist_ok=True)
-        
-        # Generate speech using Edge TTS with custom parameters
-        print(f"  Generating audio for scene {scene_index} with voice: {voice}, rate: {rate}")
-        
-        communicate = edge_tts.Communicate(text, voice, rate=rate, volume=volume, pitch=pitch)
-        await communicate.save(output_path)
-        
-        return f"Scene {scene_index} synthesized: {output_path}"
+    audio = await synthesize_scene_audio(text, scene_index, voice, rate, volume, pitch)
+    with open(output_path, 'wb') as f:
+        f.write(audio)
+    
+    return f"Scene {scene_index} synthesized: {output_path}", mp3_duration(audio)
+
+
+def tts_cache_path(cache_dir: str, text: str, voice: str, rate: str, volume: str, pitch: str) -> str:
+    """
+    Path of the cached MP3 for one set of TTS inputs
+    
+    Args:
+        cache_dir: TTS cache directory
+        text: Text to synthesize
+        voice, rate, volume, pitch: Edge TTS settings
         
-    except Exception as e:
-        return f"Error synthesizing scene {scene_index}: {str(e)}"
+    Returns:
+        Path to <cache_dir>/<blake2b digest>.mp3 (the file may not exist yet)
+    """
+    # NUL-separate the fields so ("ab", "c") and ("a", "bc") hash differently
+    key = "\0".join((text, voice, rate, volume, pitch)).encode('utf-8')
+    digest = hashlib.blake2b(key, digest_size=16).hexdigest()
+    return os.path.join(cache_dir, f"{digest}.mp3")
+
+
+def write_tts_cache(cache_path: str, audio: bytes) -> None:
+    # Write to a temp file and rename so concurrent runs never read a partial MP3
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(audio)
+    os.replace(tmp_path, cache_path)
+
 
+def mp3_duration(audio: bytes) -> float:
+    # Exact for Edge TTS output, which is constant bitrate without headers
+    return len(audio) * 8 / EDGE_TTS_MP3_BITRATE
 
-def get_audio_duration(audio_path: str) -> float:
+
+def save_mp3_stream(audio: bytes, output_path: str) -> str:
     """
-    Get the duration of an audio file using FFprobe
+    Write concatenated MP3 frames to the output file through a single ffmpeg process
+    
+    MP3 frames are self-synchronizing, so scene streams from the same encoder
+    settings can simply be joined. The result is piped to ffmpeg's stdin; it is
+    stream-copied for .mp3 outputs and decoded to PCM for .wav.
     
     Args:
-        audio_path: Path to the audio file
+        audio: Joined MP3 bytes of every scene
+        output_path: Path for combined output file (its directory must exist)
         
     Returns:
-        Duration in seconds
+        Success message
     """
     try:
-        probe = ffmpeg.probe(audio_path)
-        audio_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'audio'), None)
+        if not audio:
+            return "No audio to save"
+        
+        copy = ['-c', 'copy'] if output_path.lower().endswith('.mp3') else []
+        cmd = [*FFMPEG_QUIET, '-f', 'mp3', '-i', 'pipe:0', *copy, output_path]
         
-        if audio_stream:
-            return float(audio_stream['duration'])
+        result = subprocess.run(cmd, input=audio, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        
+        if result.returncode == 0:
+            return f"Audio saved successfully: {output_path}"
         else:
-            return 0.0
+            return f"FFmpeg error: {result.stderr.decode('utf-8', 'replace')}"
+        
     except Exception as e:
-        print(f"Warning: Could not get duration for {audio_path}: {e}")
-        return 0.0
+        return f"Error saving audio: {str(e)}"
 
 
 def combine_audio_files(audio_files: list, output_path: str) -> str:
@@ -144,7 +223,7 @@ def combine_audio_files(audio_files: list, output_path: str) -> str:
     
     Args:
         audio_files: List of audio file paths
-        output_path: Path for combined output file
+        output_path: Path for combined output file (its directory must exist)
         
     Returns:
         Success message
@@ -153,34 +232,36 @@ def combine_audio_files(audio_files: list, output_path: str) -> str:
         if not audio_files:
             return "No audio files to combine"
         
-        # Ensure output directory exists
-        output_dir = os.path.dirname(output_path)
-        if output_dir:
-            os.makedirs(output_dir, exist_ok=True)
-        
-        # Create FFmpeg command to concatenate audio files
-        cmd = ['ffmpeg', '-y']  # -y to overwrite output file
+        # Concat demuxer reads a real list file; stream copy when the container matches,
+        # otherwise (e.g. MP3 scenes into speech_all.wav) ffmpeg decodes straight to PCM
+        output_ext = os.path.splitext(output_path)[1].lower()
+        same_container = all(os.path.splitext(f)[1].lower() == output_ext for f in audio_files)
         
-        # Add input files
-        for audio_file in audio_files:
-            if os.path.exists(audio_file):
-                cmd.extend(['-i', audio_file])
+        list_path = write_concat_list(audio_files)
+        try:
+            copy = ['-c', 'copy'] if same_container else []
+            cmd = [*FFMPEG_QUIET, '-f', 'concat', '-safe', '0', '-i', list_path, *copy, output_path]
+            
+            result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        finally:
+            os.remove(list_path)
         
-        # Add filter for concatenation
-        filter_complex = 'concat=n=' + str(len(audio_files)) + ':v=0:a=1[out]'
-        cmd.extend(['-filter_complex', filter_complex])
-        cmd.extend(['-map', '[out]'])
+        if result.returncode == 0:
+            return f"Audio files combined successfully: {output_path}"
         
-        # Add output file
-        cmd.append(output_path)
+        # Inputs with mismatched codecs cannot be joined by the demuxer; use the concat filter
+        # Add input files; ffmpeg reports any missing input itself
+        inputs = [arg for audio_file in audio_files for arg in ('-i', audio_file)]
+        filter_complex = f'concat=n={len(audio_files)}:v=0:a=1[out]'
+        cmd = [*FFMPEG_QUIET, *inputs, '-filter_complex', filter_complex, '-map', '[out]', output_path]
         
         # Run FFmpeg command
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
         
         if result.returncode == 0:
             return f"Audio files combined successfully: {output_path}"
         else:
-            return f"FFmpeg error: {result.stderr}"
+            return f"FFmpeg error: {result.stderr.decode('utf-8', 'replace')}"
         
     except Exception as e:
         return f"Error combining audio files: {str(e)}"
@@ -226,27 +307,60 @@ async def synthesize_script_async(script_path: str, output_path: str,
         print(f"  Volume: {volume}")
         print(f"  Pitch: {pitch}")
         
-        # Synthesize each scene and measure actual durations
-        scene_audio_files = []
-        updated_scenes = []
-        current_time = 0.0
+        # Create the output directory once; the per-scene and combine helpers assume it exists
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
         
-        for i, scene in enumerate(scenes):
-            print(f"Synthesizing scene {i + 1}/{len(scenes)}...")
-            
-            # Create individual scene audio file
-            scene_audio_path = os.path.join(os.path.dirname(output_path), f'scene_{i + 1}.mp3')
+        # Synthesize all scenes concurrently; the semaphore keeps Edge TTS from throttling us
+        max_concurrent = tts_config.get('max_concurrent', 5)
+        semaphore = asyncio.Semaphore(max_concurrent)
+        
+        # Unchanged scenes are read back from the TTS cache instead of hitting Edge TTS again
+        cache_dir = tts_config.get('cache_dir', DEFAULT_TTS_CACHE_DIR)
+        if cache_dir:
+            cache_dir = os.path.expanduser(cache_dir)
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+            except OSError as e:
+                # The cache is only an optimisation; synthesize everything without it
+                print(f"Warning: Could not create TTS cache directory {cache_dir}: {str(e)}")
+                cache_dir = None
+        
+        async def synthesize_one(i: int, scene: dict) -> bytes:
+            cache_path = None
+            if cache_dir:
+                cache_path = tts_cache_path(cache_dir, scene['voice'], voice, rate, volume, pitch)
+                try:
+                    with open(cache_path, 'rb') as f:
+                        print(f"Scene {i + 1}/{len(scenes)} found in TTS cache")
+                        return f.read()
+                except FileNotFoundError:
+                    pass
             
-            # Synthesize scene text
-            result = await synthesize_scene_text(scene['voice'], scene_audio_path, i + 1, 
-                                                voice, rate, volume, pitch)
-            print(f"  {result}")
+            async with semaphore:
+                print(f"Synthesizing scene {i + 1}/{len(scenes)}...")
+                try:
+                    audio = await synthesize_scene_audio(scene['voice'], i + 1, voice, rate, volume, pitch)
+                except Exception as e:
+                    print(f"  Error synthesizing scene {i + 1}: {str(e)}")
+                    return b''
             
-            if os.path.exists(scene_audio_path):
-                scene_audio_files.append(scene_audio_path)
-                
-                # Measure actual duration of generated audio
-                actual_duration = get_audio_duration(scene_audio_path)
+            if cache_path and audio:
+                try:
+                    write_tts_cache(cache_path, audio)
+                except OSError as e:
+                    print(f"  Warning: Could not cache scene {i + 1}: {str(e)}")
+            return audio
+        
+        # Scene audio stays in memory; nothing is written until the final file
+        scene_audio = await asyncio.gather(*(synthesize_one(i, scene) for i, scene in enumerate(scenes)))
+        
+        # Build cumulative timings in scene order
+        updated_scenes = []
+        current_time = 0.0
+        
+        for i, (scene, audio) in enumerate(zip(scenes, scene_audio)):
+            if audio:
+                actual_duration = mp3_duration(audio)
                 
                 # Update scene with actual timing
                 updated_scene = scene.copy()
@@ -254,14 +368,14 @@ async def synthesize_script_async(script_path: str, output_path: str,
                 updated_scene['end'] = round(current_time + actual_duration, 2)
                 updated_scenes.append(updated_scene)
                 
-                print(f"  Actual duration: {actual_duration:.2f}s (start: {updated_scene['start']:.2f}s, end: {updated_scene['end']:.2f}s)")
+                print(f"  Scene {i + 1} actual duration: {actual_duration:.2f}s (start: {updated_scene['start']:.2f}s, end: {updated_scene['end']:.2f}s)")
                 
                 # Update current time for next scene
                 current_time += actual_duration
             else:
-                # If audio file doesn't exist, keep original timing
+                # If no audio was produced, keep original timing
                 updated_scenes.append(scene)
-                print(f"  Warning: Audio file not found, keeping original timing")
+                print(f"  Warning: No audio for scene {i + 1}, keeping original timing")
         
         # Update script data with actual timings
         script_data['scenes'] = updated_scenes
@@ -269,23 +383,15 @@ async def synthesize_script_async(script_path: str, output_path: str,
         
         # Save updated script with actual timings
         script_path_updated = script_path.replace('.json', '_updated.json')
-        with open(script_path_updated, 'w', encoding='utf-8') as f:
-            json.dump(script_data, f, indent=2, ensure_ascii=False)
+        write_json(script_path_updated, script_data)
         
         print(f"Updated script with actual timings saved to: {script_path_updated}")
         print(f"Total actual duration: {current_time:.2f} seconds")
         
-        # Combine all scene audio files
-        print("Combining audio files...")
-        combine_result = combine_audio_files(scene_audio_files, output_path)
-        print(combine_result)
-        
-        # Clean up individual scene files
-        for scene_file in scene_audio_files:
-            try:
-                os.remove(scene_file)
-            except:
-                pass  # Ignore cleanup errors
+        # Join the scene streams and write the final file in one ffmpeg pass
+        print("Combining audio...")
+        save_result = save_mp3_stream(b"".join(scene_audio), output_path)
+        print(save_result)
         
         return f"Speech synthesis completed: {output_path}"
         
@@ -298,7 +404,11 @@ def synthesize_script(script_path: str, output_path: str,
     """
     Synchronous wrapper for synthesize_script_async
     """
-    return asyncio.run(synthesize_script_async(script_path, output_path, voice, rate, volume, pitch))
+    coro = synthesize_script_async(script_path, output_path, voice, rate, volume, pitch)
+    if uvloop is not None:
+        # libuv-based loop; cheaper per-chunk callbacks with many concurrent TTS streams
+        return uvloop.run(coro)
+    return asyncio.run(coro)
 
 def main():
     """Main function to handle command line arguments"""
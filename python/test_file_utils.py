@@ -0,0 +1,49 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from file_utils import fast_copy
+
+
+class FastCopyTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.src = os.path.join(self.tmp_dir, 'src.bin')
+        with open(self.src, 'wb') as f:
+            f.write(b'audio data')
+
+    def read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def test_copies_into_independent_file(self):
+        dst = os.path.join(self.tmp_dir, 'dst.bin')
+        fast_copy(self.src, dst)
+        self.assertEqual(self.read(dst), b'audio data')
+        self.assertFalse(os.path.samefile(self.src, dst))
+
+    def test_replaces_existing_destination(self):
+        dst = os.path.join(self.tmp_dir, 'dst.bin')
+        with open(dst, 'wb') as f:
+            f.write(b'old contents that are longer')
+        fast_copy(self.src, dst)
+        self.assertEqual(self.read(dst), b'audio data')
+
+    def test_same_path_keeps_file(self):
+        with self.assertRaises(shutil.SameFileError):
+            fast_copy(self.src, self.src)
+        self.assertEqual(self.read(self.src), b'audio data')
+
+    def test_hardlinked_destination_keeps_file(self):
+        dst = os.path.join(self.tmp_dir, 'link.bin')
+        os.link(self.src, dst)
+        with self.assertRaises(shutil.SameFileError):
+            fast_copy(self.src, dst)
+        self.assertEqual(self.read(self.src), b'audio data')
+        self.assertEqual(self.read(dst), b'audio data')
+
+
+if __name__ == '__main__':
+    unittest.main()
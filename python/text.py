@@ -1,99 +1,145 @@
 import os
-import json
+import re
+import functools
 import tempfile
 from typing import Dict, List, Any, Tuple
 
+from file_utils import read_json
 
+# Backslashes that are not followed by a letter (ASS command)
+_ASS_BACKSLASH_RE = re.compile(r'\\(?![a-zA-Z])')
+_ASS_BRACE_TABLE = str.maketrans({'{': '\\{', '}': '\\}'})
+
+_ASS_COLOR_MAP = {
+    'white': '&H00FFFFFF',
+    'black': '&H00000000',
+    'red': '&H000000FF',
+    'green': '&H0000FF00',
+    'blue': '&H00FF0000',
+    'yellow': '&H0000FFFF',
+    'cyan': '&H00FFFF00',
+    'magenta': '&H00FF00FF'
+}
+
+_DEFAULT_RESOLUTION = '720x1280'
+
+# Subtitle setting -> (text_overlay config key, default)
+_TEXT_DEFAULTS = {
+    'font_name': ('font', 'Arial'),
+    'font_size': ('font_size', 48),
+    'font_color': ('font_color', 'white'),
+    'bg_color': ('background_color', 'black@0.7'),
+    'border_width': ('border_width', 5),
+}
+
+# ASS alignment for each text_overlay position
+_ALIGNMENT_MAP = {
+    'top': 8,      # center-top
+    'upper_third': 5,  # center-bottom (upper third)
+    'center': 2,   # center
+    'lower_third': 5,  # center-bottom (lower third)
+    'bottom': 2    # center
+}
+
+
+@functools.lru_cache(maxsize=1)
 def load_config() -> Dict[str, Any]:
     try:
         config_path = os.path.join(os.path.dirname(__file__), "..", "config.json")
-        with open(config_path, 'r') as f:
-            return json.load(f)
+        return read_json(config_path)
     except Exception as e:
         print(f"Warning: Could not load config.json: {e}")
         return {}
 
 
-
-
-def create_ass_subtitle(scenes: List[Dict[str, Any]], output_path: str) -> None:
+@functools.lru_cache(maxsize=1)
+def get_subtitle_settings() -> Dict[str, Any]:
+    # Styling and layout only depend on config.json, so resolve them once per process
     config = load_config()
     text_config = config.get('text_overlay', {})
     video_config = config.get('video', {})
     
-    # Get styling from config with defaults
-    font_name = text_config.get('font', 'Arial')
-    font_size = text_config.get('font_size', 48)
-    font_color = text_config.get('font_color', 'white')
-    bg_color = text_config.get('background_color', 'black@0.7')
-    border_width = text_config.get('border_width', 5)
-    position = text_config.get('position', 'center')
-    
     # Get video resolution from config
-    resolution = video_config.get('resolution', '720x1280')
+    width, height = _parse_resolution(video_config.get('resolution', _DEFAULT_RESOLUTION))
     
+    settings = {key: text_config.get(config_key, default)
+                for key, (config_key, default) in _TEXT_DEFAULTS.items()}
+    settings['width'] = width
+    settings['height'] = height
+    settings['margin'] = int(width * 0.08)  # 8% margin on each side
+    settings['alignment'] = _ALIGNMENT_MAP.get(text_config.get('position', 'center'), 2)
+    return settings
+
+
+def _parse_resolution(resolution: Any) -> Tuple[int, int]:
     # Handle both string and dict formats
     if isinstance(resolution, dict):
-        width = resolution.get('width', 720)
-        height = resolution.get('height', 1280)
-    else:
-        # String format like "720x1280"
-        width, height = map(int, resolution.split('x'))
-    
-    # Calculate margins based on resolution
-    margin = int(width * 0.08)  # 8% margin on each side
+        return resolution.get('width', 720), resolution.get('height', 1280)
+    return _parse_resolution_string(resolution)
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_resolution_string(resolution: str) -> Tuple[int, int]:
+    # String format like "720x1280"
+    width, height = map(int, resolution.split('x'))
+    return width, height
+
+
+def create_ass_subtitle(scenes: List[Dict[str, Any]], output_path: str) -> None:
+    settings = get_subtitle_settings()
+    font_name = settings['font_name']
+    font_size = settings['font_size']
+    font_color = settings['font_color']
+    bg_color = settings['bg_color']
+    border_width = settings['border_width']
+    width = settings['width']
+    height = settings['height']
+    margin = settings['margin']
+    alignment = settings['alignment']
     
-    # Calculate alignment based on position
-    alignment_map = {
-        'top': 8,      # center-top
-        'upper_third': 5,  # center-bottom (upper third)
-        'center': 2,   # center
-        'lower_third': 5,  # center-bottom (lower third)
-        'bottom': 2    # center
-    }
-    alignment = alignment_map.get(position, 2)
+    # Convert colors
+    primary_color = convert_color_to_ass(font_color)
+    outline_color = convert_color_to_ass('black')
+    back_color = convert_color_to_ass(bg_color)
     
     try:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            # Write ASS header with dynamic resolution
-            f.write("[Script Info]\n")
-            f.write("Title: YouTube Short Subtitles\n")
-            f.write("ScriptType: v4.00+\n")
-            f.write("WrapStyle: 2\n")
-            f.write("ScaledBorderAndShadow: yes\n")
-            f.write(f"PlayResX: {width}\n")
-            f.write(f"PlayResY: {height}\n\n")
-            
-            # Write styles
-            f.write("[V4+ Styles]\n")
-            f.write("Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\n")
-            
-            # Convert colors
-            primary_color = convert_color_to_ass(font_color)
-            outline_color = convert_color_to_ass('black')
-            back_color = convert_color_to_ass(bg_color)
-            
+        # Build ASS header with dynamic resolution
+        parts = [
+            "[Script Info]\n",
+            "Title: YouTube Short Subtitles\n",
+            "ScriptType: v4.00+\n",
+            "WrapStyle: 2\n",
+            "ScaledBorderAndShadow: yes\n",
+            f"PlayResX: {width}\n",
+            f"PlayResY: {height}\n\n",
+            # Styles
+            "[V4+ Styles]\n",
+            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\n",
             # Create dynamic style with background box enabled
             # BorderStyle: 1 = outline + shadow, 3 = box
             # Outline: border width, Shadow: shadow depth
-            f.write(f"Style: Default,{font_name},{font_size},{primary_color},{primary_color},{outline_color},{back_color},0,0,0,0,100,100,0,0,3,{border_width},0,{alignment},{margin},{margin},{margin},1\n\n")
+            f"Style: Default,{font_name},{font_size},{primary_color},{primary_color},{outline_color},{back_color},0,0,0,0,100,100,0,0,3,{border_width},0,{alignment},{margin},{margin},{margin},1\n\n",
+            # Events
+            "[Events]\n",
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n",
+        ]
+        
+        for scene in scenes:
+            start_time = format_timestamp_ass(scene['start'])
+            end_time = format_timestamp_ass(scene['end'])
+            text = scene['voice']
+            
+            # Process text for multi-line and overflow prevention
+            processed_text = process_text_for_ass(text, font_size, width, margin)
             
-            # Write events
-            f.write("[Events]\n")
-            f.write("Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n")
+            # Properly escape text for ASS format (fix backslash visibility)
+            escaped_text = escape_text_for_ass(processed_text)
             
-            for i, scene in enumerate(scenes):
-                start_time = format_timestamp_ass(scene['start'])
-                end_time = format_timestamp_ass(scene['end'])
-                text = scene['voice']
-                
-                # Process text for multi-line and overflow prevention
-                processed_text = process_text_for_ass(text, font_size, width, margin)
-                
-                # Properly escape text for ASS format (fix backslash visibility)
-                escaped_text = escape_text_for_ass(processed_text)
-                
-                f.write(f"Dialogue: 0,{start_time},{end_time},Default,,0,0,0,,{escaped_text}\n")
+            parts.append(f"Dialogue: 0,{start_time},{end_time},Default,,0,0,0,,{escaped_text}\n")
+        
+        # Write the whole document in one call
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write("".join(parts))
         
         print(f"ASS subtitle file created: {output_path}")
         
@@ -121,89 +167,66 @@ def process_text_for_ass(text: str, font_size: int, width: int, margin: int) ->
     # Ensure minimum of 15 characters per line
     max_chars_per_line = max(15, max_chars_per_line)
     
-    # Split text into words
+    # Split text into words, tracking the line length instead of rebuilding the string
     words = text.split()
     lines = []
-    current_line = ""
+    current_words = []
+    current_len = 0
     
     for word in words:
-        # Check if adding this word would exceed the limit
-        if len(current_line + " " + word) <= max_chars_per_line:
-            if current_line:
-                current_line += " " + word
-            else:
-                current_line = word
+        # Check if adding this word (plus its separating space) would exceed the limit
+        if current_len + 1 + len(word) <= max_chars_per_line:
+            current_len += len(word) + (1 if current_words else 0)
+            current_words.append(word)
         else:
             # Start a new line
-            if current_line:
-                lines.append(current_line)
-                current_line = word
+            if current_words:
+                lines.append(" ".join(current_words))
+                current_words = [word]
+                current_len = len(word)
             else:
                 # Word is too long, add it anyway
                 lines.append(word)
     
     # Add the last line
-    if current_line:
-        lines.append(current_line)
+    if current_words:
+        lines.append(" ".join(current_words))
     
     # Join lines with \\N for ASS format
     return "\\N".join(lines)
 
 
 def escape_text_for_ass(text: str) -> str:
-    # Handle ASS line breaks properly - convert \\N to actual line breaks
-    # ASS format uses \N for line breaks, not \\N
-    escaped = text.replace('\\N', '\\N')
-    
-    # Escape other special characters that need escaping in ASS
-    escaped = escaped.replace('{', '\\{')
-    escaped = escaped.replace('}', '\\}')
+    # Escape special characters that need escaping in ASS
+    escaped = text.translate(_ASS_BRACE_TABLE)
     
     # Escape backslashes that are not part of ASS commands
     # But preserve ASS commands like \N, \b, \i, etc.
-    import re
-    # Replace backslashes that are not followed by a letter (ASS command)
-    escaped = re.sub(r'\\(?![a-zA-Z])', '\\\\', escaped)
-    
-    return escaped
+    return _ASS_BACKSLASH_RE.sub('\\\\', escaped)
 
 
+@functools.lru_cache(maxsize=64)
 def convert_color_to_ass(color: str) -> str:
-    color_map = {
-        'white': '&H00FFFFFF',
-        'black': '&H00000000',
-        'red': '&H000000FF',
-        'green': '&H0000FF00',
-        'blue': '&H00FF0000',
-        'yellow': '&H0000FFFF',
-        'cyan': '&H00FFFF00',
-        'magenta': '&H00FF00FF'
-    }
-    
     # Handle transparency
-    if '@' in color:
-        base_color = color.split('@')[0]
-        alpha_str = color.split('@')[1]
-        
+    base_color, sep, alpha_str = color.partition('@')
+    if sep:
         # Convert alpha to hex (0.0-1.0 to 0-255)
         try:
-            alpha_float = float(alpha_str)
-            alpha_hex = hex(int(alpha_float * 255))[2:].upper().zfill(2)
-        except:
+            alpha_hex = f"{max(0, min(255, int(float(alpha_str) * 255))):02X}"
+        except (ValueError, OverflowError):
             alpha_hex = 'FF'  # Default to opaque
         
         # Get base color and replace alpha
-        base_ass_color = color_map.get(base_color, '&H00FFFFFF')
-        return base_ass_color[:-2] + alpha_hex
+        return _ASS_COLOR_MAP.get(base_color, '&H00FFFFFF')[:-2] + alpha_hex
     
-    return color_map.get(color, '&H00FFFFFF')
+    return _ASS_COLOR_MAP.get(color, '&H00FFFFFF')
 
 
 def format_timestamp_ass(seconds: float) -> str:
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    centisecs = int((seconds % 1) * 100)
+    # Work in whole centiseconds; rounding keeps 2-decimal timings like 1.17 exact
+    hours, rem = divmod(round(seconds * 100), 360000)
+    minutes, rem = divmod(rem, 6000)
+    secs, centisecs = divmod(rem, 100)
     
     return f"{hours}:{minutes:02d}:{secs:02d}.{centisecs:02d}"
 
@@ -219,8 +242,7 @@ def create_subtitle_file(scenes: List[Dict[str, Any]], output_path: str) -> str:
 def create_subtitle_file_from_json(scenes_json_path: str, output_path: str) -> str:
     try:
         # Load scenes data
-        with open(scenes_json_path, 'r') as f:
-            scenes_data = json.load(f)
+        scenes_data = read_json(scenes_json_path)
         
         # Extract scenes from the scenes.json structure
         if 'scenes' in scenes_data and len(scenes_data['scenes']) > 0:
@@ -258,8 +280,7 @@ def main():
     
     try:
         # Load scenes data
-        with open(scenes_json, 'r') as f:
-            scenes_data = json.load(f)
+        scenes_data = read_json(scenes_json)
         
         # Extract scenes from the scenes.json structure
         if 'scenes' in scenes_data and len(scenes_data['scenes']) > 0:
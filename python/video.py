@@ -1,39 +1,333 @@
 import os
 import sys
-import json
+import logging
+import functools
+import hashlib
+import collections
+import subprocess
 import ffmpeg
-from typing import Dict, Any, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Any, List, Optional, Tuple
 
+from file_utils import fast_copy, read_json
+from probe import probe_cached
 
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "config.json")
+
+
+@functools.lru_cache(maxsize=1)
 def load_config() -> Dict[str, Any]:
     try:
-        config_path = os.path.join(os.path.dirname(__file__), "..", "config.json")
-        with open(config_path, 'r') as f:
-            return json.load(f)
+        return read_json(CONFIG_PATH)
     except Exception as e:
-        print(f"Warning: Could not load config.json: {e}")
+        logger.warning("Could not load config.json: %s", e)
         return {}
 
 
+# libx264 defaults when config.json's video section leaves them out. The platform re-encodes
+# uploads anyway, so "faster" is the speed/quality sweet spot; use "ultrafast" + "zerolatency"
+# for the least CPU, or "medium" when quality matters more
+ENCODE_OPTS = {'preset': 'faster', 'tune': 'fastdecode', 'crf': 23}
+
+# Hardware H.264 encoders in order of preference
+HARDWARE_H264_ENCODERS = ('h264_nvenc', 'h264_qsv', 'h264_amf', 'h264_videotoolbox')
+
+# NVDEC decoders by source codec, used to keep frames on the GPU from decode to NVENC
+CUVID_DECODERS = {
+    'h264': 'h264_cuvid',
+    'hevc': 'hevc_cuvid',
+    'vp9': 'vp9_cuvid',
+    'av1': 'av1_cuvid',
+    'mpeg4': 'mpeg4_cuvid'
+}
+
+# Parallel batch jobs per GPU when encoding with NVENC
+NVENC_MAX_PARALLEL_JOBS = 2
+
+# Every background is delivered as 720x1280 (9:16)
+TARGET_WIDTH = 720
+TARGET_HEIGHT = 1280
+CROP_SCALE_FILTER = 'crop={}:{}:{}:{},scale=%d:%d' % (TARGET_WIDTH, TARGET_HEIGHT)
+SCALE_CUDA_FILTER = 'scale_cuda=%d:%d:format={}' % (TARGET_WIDTH, TARGET_HEIGHT)
+
+# Subtitle formats burn-in accepts; anything but .ass is converted first
+SUBTITLE_EXTENSIONS = ('.ass', '.srt', '.vtt')
+
+# ASS conversions of .srt/.vtt subtitles, keyed by source content
+SUBTITLE_CACHE_DIR = "~/.cache/ai-shorts/subtitles"
+
+
+@functools.lru_cache(maxsize=None)
+def encoder_works(encoder: str) -> bool:
+    # Encoders can be compiled in without a usable device, so try a tiny test encode
+    cmd = [
+        'ffmpeg', '-hide_banner', '-loglevel', 'error',
+        '-f', 'lavfi', '-i', 'color=size=256x256:duration=0.1',
+        '-c:v', encoder, '-f', 'null', '-'
+    ]
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=30)
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return result.returncode == 0
+
+
+@functools.lru_cache(maxsize=None)
+def available_codecs(kind: str) -> frozenset:
+    # Names listed by `ffmpeg -encoders` / `ffmpeg -decoders`; empty when ffmpeg cannot be run
+    try:
+        result = subprocess.run(['ffmpeg', '-hide_banner', f'-{kind}'], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.SubprocessError):
+        return frozenset()
+    return frozenset(line.split()[1] for line in result.stdout.splitlines() if len(line.split()) > 1)
+
+
+@functools.lru_cache(maxsize=1)
+def select_h264_encoder() -> str:
+    available = available_codecs('encoders')
+    for encoder in HARDWARE_H264_ENCODERS:
+        if encoder in available and encoder_works(encoder):
+            return encoder
+    
+    return 'libx264'
+
+
+def get_encode_options(config: Dict[str, Any] = None) -> Dict[str, Any]:
+    # Encoder settings shared by every H.264 output, read from the video section of config.json
+    if config is None:
+        config = load_config()
+    video_config = config.get('video', {})
+    
+    codec = video_config.get('codec', 'auto')
+    if codec == 'auto':
+        codec = select_h264_encoder()
+    crf = video_config.get('crf', ENCODE_OPTS['crf'])
+    
+    if codec == 'h264_nvenc':
+        options = {'preset': 'p4', 'tune': 'hq', 'rc': 'vbr', 'cq': crf, 'b:v': 0}
+    elif codec == 'h264_videotoolbox':
+        options = {'q:v': 50}
+    elif codec == 'h264_qsv':
+        options = {'preset': 'medium', 'global_quality': crf}
+    elif codec == 'h264_amf':
+        options = {'quality': 'balanced', 'rc': 'cqp', 'qp_i': crf - 1, 'qp_p': crf + 1}
+    else:
+        options = {
+            'preset': video_config.get('preset', ENCODE_OPTS['preset']),
+            'crf': crf,
+            'tune': video_config.get('tune', ENCODE_OPTS['tune'])
+        }
+    
+    # 8-bit 4:2:0 Main@4.0 plays everywhere (phones, browsers) and covers 1080x1920 at 30 fps
+    return {
+        'vcodec': codec,
+        **options,
+        'pix_fmt': 'yuv420p',
+        'profile:v': 'main',
+        'level': '4.0',
+        'movflags': '+faststart'
+    }
+
+
+def frame_rate_filter(input_fps: float) -> List[str]:
+    # Drop surplus frames first so crop/scale/subtitle filters only process the output rate
+    target_fps = load_config().get('video', {}).get('fps', 30)
+    if target_fps and input_fps > target_fps:
+        return [f'fps={target_fps}']
+    return []
+
+
+def ffmpeg_args(options: Dict[str, Any]) -> List[str]:
+    # ffmpeg-python style kwargs ({'vcodec': 'libx264', 'an': None}) as argv: -key [value]
+    args = []
+    for key, value in options.items():
+        args.append(f'-{key}')
+        if value is not None:
+            args.append(str(value))
+    return args
+
+
+def escape_filter_value(value: str) -> str:
+    # Escape once for the filter option and once more for the filtergraph (see ffmpeg-filters "Notes on filtergraph escaping")
+    for char in "\\':":
+        value = value.replace(char, '\\' + char)
+    for char in "\\'[],;":
+        value = value.replace(char, '\\' + char)
+    return value
+
+
+def filter_thread_args(threads: int = 0) -> List[str]:
+    # Cap filtering to the same thread budget as the encoder so parallel jobs share the cores;
+    # 0 leaves ffmpeg's automatic per-core default
+    if not threads:
+        return []
+    return ['-filter_threads', str(threads), '-filter_complex_threads', str(threads)]
+
+
+def run_ffmpeg_argv(args: List[str], threads: int = 0) -> None:
+    # Linear -vf chains need no graph object; hand ffmpeg a ready-made argv
+    # Only errors reach the stderr pipe, so nothing piles up in memory during long encodes
+    result = subprocess.run(['ffmpeg', '-hide_banner', '-nostats', '-loglevel', 'error', '-y',
+                             *filter_thread_args(threads), *args],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise ffmpeg.Error('ffmpeg', None, result.stderr)
+
+
+def get_decode_options(encode_options: Dict[str, Any]) -> Dict[str, Any]:
+    # Decode on the same GPU as the encoder; frames come back to system memory for the CPU filters
+    if encode_options['vcodec'] == 'h264_nvenc':
+        return {'hwaccel': 'cuda'}
+    return {}
+
+
+def cuda_crop_options(info: Dict[str, Any], crop_box: Tuple[int, int, int, int]) -> Optional[Dict[str, Any]]:
+    # Input options decoding with NVDEC and cropping inside the decoder (there is no crop_cuda filter);
+    # None when the source codec has no cuvid decoder in this ffmpeg build
+    decoder = CUVID_DECODERS.get(info['codec'])
+    if decoder is None or decoder not in available_codecs('decoders'):
+        return None
+    
+    crop_width, crop_height, x_offset, y_offset = crop_box
+    bottom = info['height'] - crop_height - y_offset
+    right = info['width'] - crop_width - x_offset
+    return {
+        'hwaccel': 'cuda',
+        'hwaccel_output_format': 'cuda',
+        'c:v': decoder,
+        'crop': f'{y_offset}x{bottom}x{x_offset}x{right}'
+    }
+
+
+def crop_scale_options(info: Dict[str, Any], crop_box: Tuple[int, int, int, int],
+                       encode_options: Dict[str, Any], allow_gpu: bool = True) -> Tuple[Dict[str, Any], str]:
+    # (input options, -vf crop+scale) for cropping to crop_box and scaling to the target size.
+    # With NVENC and a cuvid decoder, NVDEC crops, scale_cuda resizes and NVENC encodes, so frames
+    # never leave VRAM; scale_cuda then does the pixel format conversion, so pix_fmt is popped
+    # from encode_options. allow_gpu=False keeps frames in system memory for CPU filters (libass)
+    if allow_gpu and encode_options['vcodec'] == 'h264_nvenc':
+        cuda_options = cuda_crop_options(info, crop_box)
+        if cuda_options:
+            return cuda_options, SCALE_CUDA_FILTER.format(encode_options.pop('pix_fmt'))
+    
+    return get_decode_options(encode_options), CROP_SCALE_FILTER.format(*crop_box)
+
+
+def parse_frame_rate(rate: str) -> float:
+    # FFprobe rates look like "30000/1001" or "30"; "0/0" means unknown and maps to 0.0
+    num, _, den = rate.partition('/')
+    if not den:
+        return float(num)
+    den = int(den)
+    return int(num) / den if den else 0.0
+
+
 def get_video_info(input_path: str) -> Dict[str, Any]:
     try:
-        probe = ffmpeg.probe(input_path)
+        probe = probe_cached(input_path)
         video_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'video'), None)
         
         if not video_stream:
             raise Exception("No video stream found")
         
+        width = int(video_stream.get('width', 0))
+        height = int(video_stream.get('height', 0))
+        if width <= 0 or height <= 0:
+            raise Exception("Video stream has no dimensions")
+        
+        # Some containers (e.g. MKV) only report the duration at the format level
+        duration = video_stream.get('duration') or probe.get('format', {}).get('duration')
+        if duration is None:
+            raise Exception("Video duration is unknown")
+        
         return {
-            'width': int(video_stream['width']),
-            'height': int(video_stream['height']),
-            'duration': float(video_stream['duration']),
-            'fps': eval(video_stream['r_frame_rate']),
-            'codec': video_stream['codec_name']
+            'width': width,
+            'height': height,
+            'duration': float(duration),
+            'fps': parse_frame_rate(video_stream.get('r_frame_rate', '0/0')),
+            'codec': video_stream.get('codec_name', '')
         }
     except Exception as e:
         raise Exception(f"Error getting video info: {str(e)}")
 
 
+def run_ffmpeg(output, tail_lines: int = 50, threads: int = 0) -> None:
+    # Stream stderr instead of buffering it all; only the tail is kept for the error message
+    process = ffmpeg.run_async(output.global_args('-nostats', *filter_thread_args(threads)),
+                               overwrite_output=True, pipe_stderr=True)
+    last_lines = collections.deque(maxlen=tail_lines)
+    for line in process.stderr:
+        last_lines.append(line)
+    
+    if process.wait() != 0:
+        raise ffmpeg.Error('ffmpeg', None, b''.join(last_lines))
+
+
+def is_prepared_background(video_path: str) -> bool:
+    # True when the video is already H.264 at the 720x1280 size produced by prepare_video.py
+    try:
+        info = get_video_info(video_path)
+    except Exception:
+        return False
+    return info['codec'] == 'h264' and (info['width'], info['height']) == (TARGET_WIDTH, TARGET_HEIGHT)
+
+
+def compute_crop_9_16(width: int, height: int) -> Tuple[int, int, int, int]:
+    # Largest centered 9:16 window: (crop_width, crop_height, x_offset, y_offset)
+    # Calculate crop dimensions in integers (same results as the float ratios, without the divisions)
+    if width * TARGET_HEIGHT > height * TARGET_WIDTH:
+        # Video is wider than target, crop width
+        crop_width = height * TARGET_WIDTH // TARGET_HEIGHT
+        crop_height = height
+        x_offset = (width - crop_width) // 2
+        y_offset = 0
+    else:
+        # Video is taller than target, crop height
+        crop_width = width
+        crop_height = width * TARGET_HEIGHT // TARGET_WIDTH
+        x_offset = 0
+        y_offset = (height - crop_height) // 2
+    
+    return crop_width, crop_height, x_offset, y_offset
+
+
+def subtitle_extension(subtitle_path: str) -> str:
+    # Lower-case extension of a supported subtitle file
+    subtitle_ext = os.path.splitext(subtitle_path)[1].lower()
+    if subtitle_ext not in SUBTITLE_EXTENSIONS:
+        raise ValueError(f"Unsupported subtitle format: {subtitle_ext}")
+    return subtitle_ext
+
+
+def ensure_ass_subtitles(subtitle_path: str) -> str:
+    # Convert .srt/.vtt to ASS once so burn-in always goes through the ass filter. Conversions live
+    # in SUBTITLE_CACHE_DIR (the source directory may be read-only) and are written to a temp file
+    # and renamed, so parallel batch jobs sharing a subtitle never read a partial file
+    subtitle_ext = subtitle_extension(subtitle_path)
+    if subtitle_ext == '.ass':
+        return subtitle_path
+    
+    with open(subtitle_path, 'rb') as f:
+        digest = hashlib.blake2b(subtitle_ext.encode('utf-8') + b'\0' + f.read(), digest_size=16).hexdigest()
+    
+    cache_dir = os.path.expanduser(SUBTITLE_CACHE_DIR)
+    ass_path = os.path.join(cache_dir, f"{digest}.ass")
+    if os.path.exists(ass_path):
+        return ass_path
+    
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{ass_path}.{os.getpid()}.tmp"
+    try:
+        run_ffmpeg_argv(['-i', subtitle_path, '-f', 'ass', tmp_path])
+        os.replace(tmp_path, ass_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return ass_path
+
+
 def crop_video_to_9_16(input_path: str, output_path: str) -> None:
     try:
         # Get video info
@@ -42,199 +336,243 @@ def crop_video_to_9_16(input_path: str, output_path: str) -> None:
         height = info['height']
         
         # Calculate crop parameters for 9:16 aspect ratio
-        target_width = 720
-        target_height = 1280
-        
-        # Calculate crop dimensions
-        if width / height > target_width / target_height:
-            # Video is wider than target, crop width
-            crop_width = int(height * target_width / target_height)
-            crop_height = height
-            x_offset = (width - crop_width) // 2
-            y_offset = 0
-        else:
-            # Video is taller than target, crop height
-            crop_width = width
-            crop_height = int(width * target_height / target_width)
-            x_offset = 0
-            y_offset = (height - crop_height) // 2
-        
-        print(f"Original: {width}x{height}")
-        print(f"Cropping to: {crop_width}x{crop_height} at offset ({x_offset}, {y_offset})")
+        crop_width, crop_height, x_offset, y_offset = compute_crop_9_16(width, height)
         
-        # Create input stream
-        input_stream = ffmpeg.input(input_path)
+        logger.info("Original: %sx%s", width, height)
+        logger.info("Cropping to: %sx%s at offset (%s, %s)", crop_width, crop_height, x_offset, y_offset)
         
-        # Crop video
-        cropped = ffmpeg.crop(input_stream, x_offset, y_offset, crop_width, crop_height)
+        encode_options = get_encode_options()
         
-        # Scale to target resolution
-        scaled = ffmpeg.filter(cropped, 'scale', target_width, target_height)
-        
-        # Output
-        output = ffmpeg.output(scaled, output_path, vcodec='libx264', preset='fast', crf=23)
+        # Crop video, then scale to target resolution (video only, as before)
+        input_options, vf = crop_scale_options(info, (crop_width, crop_height, x_offset, y_offset), encode_options)
         
         # Run conversion
-        ffmpeg.run(output, overwrite_output=True, quiet=True)
+        run_ffmpeg_argv([
+            *ffmpeg_args(input_options), '-i', input_path,
+            '-vf', vf, '-an', *ffmpeg_args(encode_options), output_path
+        ])
         
-        print(f"Video cropped to 9:16: {output_path}")
+        logger.info("Video cropped to 9:16: %s", output_path)
         
     except Exception as e:
         raise Exception(f"Error cropping video: {str(e)}")
 
 
-def trim_video_to_duration(input_path: str, output_path: str, target_duration: float) -> None:
+def trim_video_to_duration(input_path: str, output_path: str, target_duration: float, accurate: bool = False) -> None:
     try:
         # Get video info
         info = get_video_info(input_path)
         current_duration = info['duration']
         
-        print(f"Current duration: {current_duration:.2f} seconds")
-        print(f"Target duration: {target_duration:.2f} seconds")
+        logger.info("Current duration: %.2f seconds", current_duration)
+        logger.info("Target duration: %.2f seconds", target_duration)
         
         if current_duration <= target_duration:
-            print("Video is already short enough, copying...")
-            import shutil
-            shutil.copy2(input_path, output_path)
+            logger.info("Video is already short enough, copying...")
+            fast_copy(input_path, output_path)
             return
         
-        # Create input stream
-        input_stream = ffmpeg.input(input_path)
-        
-        # Trim video
-        trimmed = ffmpeg.filter(input_stream, 'trim', duration=target_duration)
-        
-        # Output
-        output = ffmpeg.output(trimmed, output_path, vcodec='libx264', preset='fast', crf=23)
+        if accurate:
+            encode_options = get_encode_options()
+            
+            # Trim video (re-encode for a frame-exact cut)
+            args = [
+                *ffmpeg_args(get_decode_options(encode_options)), '-i', input_path,
+                '-vf', f'trim=duration={target_duration}', '-an', *ffmpeg_args(encode_options), output_path
+            ]
+        else:
+            # No pixels change, so cut at the container level and copy the packets
+            args = ['-t', str(target_duration), '-i', input_path, '-an', '-c', 'copy', '-movflags', '+faststart', output_path]
         
         # Run conversion
-        ffmpeg.run(output, overwrite_output=True, quiet=True)
+        run_ffmpeg_argv(args)
         
-        print(f"Video trimmed to {target_duration:.2f} seconds: {output_path}")
+        logger.info("Video trimmed to %.2f seconds: %s", target_duration, output_path)
         
     except Exception as e:
         raise Exception(f"Error trimming video: {str(e)}")
 
 
-def loop_video_to_duration(input_path: str, output_path: str, target_duration: float) -> None:
+def loop_video_to_duration(input_path: str, output_path: str, target_duration: float, accurate: bool = False) -> None:
     try:
         # Get video info
         info = get_video_info(input_path)
         current_duration = info['duration']
         
-        print(f"Current duration: {current_duration:.2f} seconds")
-        print(f"Target duration: {target_duration:.2f} seconds")
+        logger.info("Current duration: %.2f seconds", current_duration)
+        logger.info("Target duration: %.2f seconds", target_duration)
         
         if current_duration >= target_duration:
-            print("Video is already long enough, trimming...")
-            trim_video_to_duration(input_path, output_path, target_duration)
+            logger.info("Video is already long enough, trimming...")
+            trim_video_to_duration(input_path, output_path, target_duration, accurate)
             return
         
-        # Calculate number of loops needed
-        loops_needed = int(target_duration / current_duration) + 1
-        
-        print(f"Looping video {loops_needed} times...")
-        
-        # Create input stream
-        input_stream = ffmpeg.input(input_path)
-        
-        # Loop video
-        looped = ffmpeg.filter(input_stream, 'loop', loop=loops_needed, size=32767, start=0)
-        
-        # Trim to exact duration
-        trimmed = ffmpeg.filter(looped, 'trim', duration=target_duration)
-        
-        # Output
-        output = ffmpeg.output(trimmed, output_path, vcodec='libx264', preset='fast', crf=23)
+        # Loop at the demuxer rather than with the loop filter, which buffers every decoded frame in RAM
+        if accurate:
+            logger.info("Looping video at the demuxer and re-encoding...")
+            
+            encode_options = get_encode_options()
+            
+            # Decoded frames are exact, so -t cuts on the target frame
+            args = [
+                '-stream_loop', '-1', *ffmpeg_args(get_decode_options(encode_options)), '-i', input_path,
+                '-t', str(target_duration), '-an', *ffmpeg_args(encode_options), output_path
+            ]
+        else:
+            logger.info("Looping video at the demuxer with stream copy...")
+            
+            # Replay the packets until -t is reached; nothing is decoded or encoded
+            args = [
+                '-stream_loop', '-1', '-t', str(target_duration), '-i', input_path,
+                '-an', '-c', 'copy', '-movflags', '+faststart', output_path
+            ]
         
         # Run conversion
-        ffmpeg.run(output, overwrite_output=True, quiet=True)
+        run_ffmpeg_argv(args)
         
-        print(f"Video looped to {target_duration:.2f} seconds: {output_path}")
+        logger.info("Video looped to %.2f seconds: %s", target_duration, output_path)
         
     except Exception as e:
         raise Exception(f"Error looping video: {str(e)}")
 
 
-def prepare_background_video(input_path: str, output_path: str, target_duration: float) -> None:
+def prepare_background_video(input_path: str, output_path: str, target_duration: float,
+                             subtitle_path: Optional[str] = None, threads: int = 0) -> None:
     try:
-        # First crop to 9:16 aspect ratio
-        temp_cropped = output_path.replace('.mp4', '_cropped.mp4')
-        crop_video_to_9_16(input_path, temp_cropped)
+        # One probe and one ffmpeg pass: crop, scale, loop/trim (and optionally burn subtitles)
+        info = get_video_info(input_path)
+        crop_width, crop_height, x_offset, y_offset = compute_crop_9_16(info['width'], info['height'])
+        
+        logger.info("Original: %sx%s, %.2f seconds", info['width'], info['height'], info['duration'])
+        logger.info("Cropping to: %sx%s at offset (%s, %s)", crop_width, crop_height, x_offset, y_offset)
+        
+        encode_options = get_encode_options()
+        if threads:
+            encode_options['threads'] = threads
+        
+        # libass renders on the CPU, so the all-GPU path only applies without subtitles
+        input_options, crop_scale = crop_scale_options(info, (crop_width, crop_height, x_offset, y_offset),
+                                                       encode_options, allow_gpu=not subtitle_path)
+        output_options = {}
         
-        # Then adjust duration
         if target_duration > 0:
-            loop_video_to_duration(temp_cropped, output_path, target_duration)
-        else:
-            # Just copy the cropped video
-            import shutil
-            shutil.copy2(temp_cropped, output_path)
+            logger.info("Target duration: %.2f seconds", target_duration)
+            output_options['t'] = target_duration
+            if info['duration'] < target_duration:
+                # Loop at the demuxer; -t stops the output at the target duration
+                input_options['stream_loop'] = -1
         
-        # Clean up temp file
-        if os.path.exists(temp_cropped):
-            os.remove(temp_cropped)
+        # Crop to 9:16 and scale to target resolution
+        filters = [*frame_rate_filter(info['fps']), crop_scale]
         
-        print(f"Background video prepared: {output_path}")
+        if subtitle_path:
+            filters.append(f'ass={escape_filter_value(ensure_ass_subtitles(subtitle_path))}')
+        
+        # Run conversion
+        run_ffmpeg_argv([
+            *ffmpeg_args(input_options), '-i', input_path,
+            '-vf', ','.join(filters), '-an', *ffmpeg_args(output_options), *ffmpeg_args(encode_options), output_path
+        ], threads=threads)
+        
+        logger.info("Background video prepared: %s", output_path)
         
     except Exception as e:
         raise Exception(f"Error preparing background video: {str(e)}")
 
 
-def add_subtitles_to_video(video_path: str, subtitle_path: str, output_path: str) -> None:
+def add_subtitles_to_video(video_path: str, subtitle_path: str, output_path: str, threads: int = 0) -> None:
     try:
-        # Get subtitle file extension
-        subtitle_ext = os.path.splitext(subtitle_path)[1].lower()
-        
-        if subtitle_ext == '.srt':
-            subtitle_filter = 'subtitles'
-        elif subtitle_ext == '.ass':
-            subtitle_filter = 'ass'
-        elif subtitle_ext == '.vtt':
-            subtitle_filter = 'subtitles'
-        else:
-            raise ValueError(f"Unsupported subtitle format: {subtitle_ext}")
+        subtitle_path = ensure_ass_subtitles(subtitle_path)
         
-        print(f"Adding subtitles using {subtitle_filter} filter...")
+        logger.info("Adding subtitles using ass filter...")
         
-        # Create input stream (this will include both video and audio if present)
-        input_stream = ffmpeg.input(video_path)
+        encode_options = get_encode_options()
+        if threads:
+            encode_options['threads'] = threads
         
-        # Add subtitles to video stream only
-        if subtitle_filter == 'ass':
-            subtitled = ffmpeg.filter(input_stream['v'], 'ass', subtitle_path)
-        else:
-            subtitled = ffmpeg.filter(input_stream['v'], 'subtitles', subtitle_path)
-        
-        # Output with both video and audio streams
-        output = ffmpeg.output(
-            subtitled, 
-            input_stream['a'],  # Include audio stream
-            output_path, 
-            vcodec='libx264', 
-            acodec='aac',
-            preset='fast', 
-            crf=23
-        )
+        # The pipeline's audio is already AAC; only re-encode when it is not. Prepared
+        # backgrounds have no audio at all, so there is nothing to encode for them
+        streams = probe_cached(video_path)['streams']
+        audio_stream = next((stream for stream in streams if stream['codec_type'] == 'audio'), None)
+        audio_options = []
+        if audio_stream:
+            audio_options = ['-acodec', 'copy' if audio_stream.get('codec_name') == 'aac' else 'aac']
         
-        # Run conversion
-        ffmpeg.run(output, overwrite_output=True, quiet=True)
+        # Add subtitles to video stream only, after capping the frame rate
+        filters = [
+            *frame_rate_filter(get_video_info(video_path)['fps']),
+            f'ass={escape_filter_value(subtitle_path)}'
+        ]
+        
+        # Run conversion with both video and audio streams
+        run_ffmpeg_argv([
+            *ffmpeg_args(get_decode_options(encode_options)), '-i', video_path,
+            '-map', '0:v:0', '-map', '0:a?',  # Include audio stream when there is one
+            '-vf', ','.join(filters), *audio_options, *ffmpeg_args(encode_options), output_path
+        ], threads=threads)
         
-        print(f"Video with subtitles created: {output_path}")
+        logger.info("Video with subtitles created: %s", output_path)
         
     except Exception as e:
         raise Exception(f"Error adding subtitles to video: {str(e)}")
 
 
+def run_video_job(job: Dict[str, Any], threads: int = 0) -> str:
+    # One batch entry: {"command": "prepare", "input", "output", "duration", ["subtitle"]}
+    # or {"command": "subtitles", "video", "subtitle", "output"}
+    command = job['command']
+    if command == 'prepare':
+        prepare_background_video(job['input'], job['output'], float(job['duration']),
+                                 job.get('subtitle'), threads=threads)
+    elif command == 'subtitles':
+        add_subtitles_to_video(job['video'], job['subtitle'], job['output'], threads=threads)
+    else:
+        raise ValueError(f"Unsupported batch command: {command}")
+    return job['output']
+
+
+def run_parallel_jobs(worker: Callable[[Dict[str, Any], int], str], jobs: List[Dict[str, Any]],
+                      threads_per_job: int) -> List[str]:
+    """
+    Run independent ffmpeg jobs in a process pool, each ffmpeg process capped to a few threads
+    
+    Args:
+        worker: Module-level function called as worker(job, threads_per_job)
+        jobs: Job dicts passed to the worker
+        threads_per_job: FFmpeg thread count for each job
+        
+    Returns:
+        Worker results in the same order as jobs
+    """
+    max_workers = max(1, (os.cpu_count() or 1) // threads_per_job)
+    if get_encode_options()['vcodec'] == 'h264_nvenc':
+        # Consumer GPUs only allow a handful of concurrent NVENC sessions
+        max_workers = min(max_workers, NVENC_MAX_PARALLEL_JOBS)
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(worker, job, threads_per_job) for job in jobs]
+        return [future.result() for future in futures]
+
+
+def run_video_jobs(jobs: List[Dict[str, Any]], threads_per_job: int = 2) -> List[str]:
+    # Independent prepare/subtitles jobs (see run_video_job); returns output paths in job order
+    return run_parallel_jobs(run_video_job, jobs, threads_per_job)
+
+
 def main():
+    # Library callers configure logging themselves; the CLI keeps the plain progress lines
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
     if len(sys.argv) < 2:
         print("Usage: python video.py <command> [args...]")
         print("Commands:")
         print("  info <video_file> - Get video information")
         print("  crop <input> <output> - Crop to 9:16 aspect ratio")
-        print("  trim <input> <output> <duration> - Trim to duration")
-        print("  loop <input> <output> <duration> - Loop to duration")
-        print("  prepare <input> <output> <duration> - Prepare background video")
+        print("  trim <input> <output> <duration> [--accurate] - Trim to duration")
+        print("  loop <input> <output> <duration> [--accurate] - Loop to duration")
+        print("  prepare <input> <output> <duration> [subtitle] - Prepare background video")
         print("  subtitles <video> <subtitle> <output> - Add subtitles")
+        print("  batch <jobs_json> - Run a JSON list of prepare/subtitles jobs in parallel")
         sys.exit(1)
     
     command = sys.argv[1]
@@ -260,33 +598,36 @@ def main():
         
         elif command == "trim":
             if len(sys.argv) < 5:
-                print("Usage: python video.py trim <input> <output> <duration>")
+                print("Usage: python video.py trim <input> <output> <duration> [--accurate]")
                 sys.exit(1)
             
             input_path = sys.argv[2]
             output_path = sys.argv[3]
             duration = float(sys.argv[4])
-            trim_video_to_duration(input_path, output_path, duration)
+            accurate = '--accurate' in sys.argv[5:]
+            trim_video_to_duration(input_path, output_path, duration, accurate)
         
         elif command == "loop":
             if len(sys.argv) < 5:
-                print("Usage: python video.py loop <input> <output> <duration>")
+                print("Usage: python video.py loop <input> <output> <duration> [--accurate]")
                 sys.exit(1)
             
             input_path = sys.argv[2]
             output_path = sys.argv[3]
             duration = float(sys.argv[4])
-            loop_video_to_duration(input_path, output_path, duration)
+            accurate = '--accurate' in sys.argv[5:]
+            loop_video_to_duration(input_path, output_path, duration, accurate)
         
         elif command == "prepare":
             if len(sys.argv) < 5:
-                print("Usage: python video.py prepare <input> <output> <duration>")
+                print("Usage: python video.py prepare <input> <output> <duration> [subtitle]")
                 sys.exit(1)
             
             input_path = sys.argv[2]
             output_path = sys.argv[3]
             duration = float(sys.argv[4])
-            prepare_background_video(input_path, output_path, duration)
+            subtitle_path = sys.argv[5] if len(sys.argv) > 5 else None
+            prepare_background_video(input_path, output_path, duration, subtitle_path)
         
         elif command == "subtitles":
             if len(sys.argv) < 5:
@@ -298,6 +639,15 @@ def main():
             output_path = sys.argv[4]
             add_subtitles_to_video(video_path, subtitle_path, output_path)
         
+        elif command == "batch":
+            if len(sys.argv) < 3:
+                print("Usage: python video.py batch <jobs_json>")
+                sys.exit(1)
+            
+            jobs = read_json(sys.argv[2])
+            for output_path in run_video_jobs(jobs):
+                print(f"Done: {output_path}")
+        
         else:
             print(f"Unknown command: {command}")
             sys.exit(1)